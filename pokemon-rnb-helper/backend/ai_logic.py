@@ -1,6 +1,25 @@
 from typing import List, Dict, Optional
 from main import Pokemon, Move, BattleState
-import random
+import numpy as np
+
+# Stat stage multipliers for stages -6 to +6, indexed by stage + 6
+_STAGE_MULT = tuple((s + 2) / 2 if s >= 0 else 2 / (-s + 2) for s in range(-6, 7))
+
+# Pool of uniform random numbers for score rolls, refilled in bulk when used up.
+# AI scoring only needs statistical randomness, not a cryptographic source.
+_RAND_POOL_SIZE = 1024
+_RNG = np.random.default_rng()
+_RAND_POOL = _RNG.random(_RAND_POOL_SIZE).tolist()
+_RAND_POS = 0
+
+def _next_rand() -> float:
+    global _RAND_POOL, _RAND_POS
+    if _RAND_POS >= _RAND_POOL_SIZE:
+        _RAND_POOL = _RNG.random(_RAND_POOL_SIZE).tolist()
+        _RAND_POS = 0
+    value = _RAND_POOL[_RAND_POS]
+    _RAND_POS += 1
+    return value
 
 def calculate_damage(move: Move, attacker: Pokemon, defender: Pokemon, weather: Optional[str] = None) -> float:
     # Basic damage calculation
@@ -24,9 +43,8 @@ def calculate_damage(move: Move, attacker: Pokemon, defender: Pokemon, weather:
     return damage
 
 def get_stat_stage_multiplier(stage: int) -> float:
-    if stage >= 0:
-        return (stage + 2) / 2
-    return 2 / (abs(stage) + 2)
+    # Stages come from the client unchecked; clamp them to -6..+6 before indexing
+    return _STAGE_MULT[max(-6, min(6, stage)) + 6]
 
 def calculate_move_score(move: Move, battle_state: BattleState) -> float:
     base_score = 6.0  # Default score for most moves
@@ -34,16 +52,16 @@ def calculate_move_score(move: Move, battle_state: BattleState) -> float:
     defender = battle_state.player_pokemon
     
     # Calculate if move is highest damaging
-    damage = calculate_damage(move, attacker, defender, battle_state.weather)
-    is_highest_damaging = True  # TODO: Compare with other moves
+    # TODO: Compare with other moves, computing each move's damage once per battle state
+    is_highest_damaging = True
     
     if is_highest_damaging:
-        base_score = 6.0 if random.random() < 0.8 else 8.0
+        base_score = 6.0 if _next_rand() < 0.8 else 8.0
     
     # Special move scoring logic based on move type
     if move.name in ["Stealth Rock", "Spikes", "Toxic Spikes"]:
         if not any(h == move.name for h in battle_state.hazards):
-            base_score = 8.0 if random.random() < 0.25 else 9.0
+            base_score = 8.0 if _next_rand() < 0.25 else 9.0
     
     elif move.name == "Protect":
         base_score = calculate_protect_score(battle_state)
@@ -1,7 +1,12 @@
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
-import math
-import copy
+from functools import lru_cache
+import logging
+import time
+import numpy as np
+from numba import njit, typed, types as nb_types
+
+logger = logging.getLogger(__name__)
 
 # Type effectiveness chart
 TYPE_CHART = {
@@ -25,7 +30,32 @@ TYPE_CHART = {
     "Fairy": {"Fire": 0.5, "Fighting": 2, "Poison": 0.5, "Dragon": 2, "Dark": 2, "Steel": 0.5}
 }
 
-@dataclass
+# Flat (attacker, defender) -> multiplier lookup for scalar Python callers
+TYPE_EFF = {(atk_type, def_type): float(multiplier) for atk_type, row in TYPE_CHART.items() for def_type, multiplier in row.items()}
+
+# Integer ids for each type and the chart as a dense (attacker, defender) matrix
+TYPES = list(TYPE_CHART.keys())
+TYPE_IDX = {name: i for i, name in enumerate(TYPES)}
+TYPE_MATRIX = np.ones((len(TYPES), len(TYPES)), dtype=np.float32)
+for _atk_type, _row in TYPE_CHART.items():
+    for _def_type, _multiplier in _row.items():
+        TYPE_MATRIX[TYPE_IDX[_atk_type], TYPE_IDX[_def_type]] = _multiplier
+
+# Weather damage multipliers by (weather, move type); anything missing is 1.0
+WEATHER_BOOST = {
+    ("Sun", "Fire"): 1.5,
+    ("Sun", "Water"): 0.5,
+    ("Rain", "Water"): 1.5,
+    ("Rain", "Fire"): 0.5
+}
+
+# Same multipliers as a (weather id, type id) matrix; id 0 is no weather
+WEATHER_IDS = {"Sun": 1, "Rain": 2}
+WEATHER_MATRIX = np.ones((len(WEATHER_IDS) + 1, len(TYPES)), dtype=np.float64)
+for (_weather, _move_type), _multiplier in WEATHER_BOOST.items():
+    WEATHER_MATRIX[WEATHER_IDS[_weather], TYPE_IDX[_move_type]] = _multiplier
+
+@dataclass(slots=True, frozen=True)
 class BattleAction:
     """Represents a single action in battle."""
     action_type: str  # "move" or "switch"
@@ -33,19 +63,26 @@ class BattleAction:
     index: int  # move index or pokemon index
     target_index: Optional[int] = None  # for multi-target moves
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Turn:
     """Represents a single turn in battle."""
     player_action: Optional[BattleAction]
     opponent_action: Optional[BattleAction]
     results: List[Dict]  # List of action results in order of execution
 
+@lru_cache(maxsize=None)
+def make_action(action_type: str, user: str, index: int, target_index: Optional[int] = None) -> BattleAction:
+    """Return a shared BattleAction; actions are immutable, so equal ones can be reused."""
+    return BattleAction(action_type, user, index, target_index)
+
 def calculate_type_effectiveness(move_type: str, defender_types: List[str]) -> float:
     """Calculate type effectiveness of a move against a Pokémon."""
+    if len(defender_types) == 2:
+        def_type1, def_type2 = defender_types
+        return TYPE_EFF.get((move_type, def_type1), 1.0) * TYPE_EFF.get((move_type, def_type2), 1.0)
     multiplier = 1.0
     for def_type in defender_types:
-        if move_type in TYPE_CHART and def_type in TYPE_CHART[move_type]:
-            multiplier *= TYPE_CHART[move_type][def_type]
+        multiplier *= TYPE_EFF.get((move_type, def_type), 1.0)
     return multiplier
 
 def calculate_damage(move: Dict, attacker: Dict, defender: Dict, weather: Optional[str] = None) -> Tuple[int, int]:
@@ -78,15 +115,11 @@ def calculate_damage(move: Dict, attacker: Dict, defender: Dict, weather: Option
     modifiers = stab * type_effect
     
     # Weather effects
-    if weather:
-        if weather == "Sun" and move["type"] == "Fire":
-            modifiers *= 1.5
-        elif weather == "Rain" and move["type"] == "Water":
-            modifiers *= 1.5
-        
+    modifiers *= WEATHER_BOOST.get((weather, move["type"]), 1.0)
+    
     # Calculate damage range (85-100% random factor)
-    min_damage = math.floor(base_damage * modifiers * 0.85)
-    max_damage = math.floor(base_damage * modifiers)
+    min_damage = int(base_damage * modifiers * 0.85)
+    max_damage = int(base_damage * modifiers)
     
     return (min_damage, max_damage)
 
@@ -96,93 +129,364 @@ def evaluate_position(battle_state: Dict) -> float:
     opponent_score = 0
     
     # Calculate total remaining HP percentage for each team
-    for pokemon in battle_state["player_team"]["pokemon"]:
+    player_pokemon = battle_state["player_team"]["pokemon"]
+    opponent_pokemon = battle_state["opponent_team"]["pokemon"]
+    for pokemon in player_pokemon:
         max_hp = pokemon["stats"]["HP"]
-        if "current_hp" not in pokemon:
-            pokemon["current_hp"] = max_hp
-        current_hp = pokemon["current_hp"]
+        current_hp = pokemon.get("current_hp", max_hp)
         player_score += current_hp / max_hp
     
-    for pokemon in battle_state["opponent_team"]["pokemon"]:
+    for pokemon in opponent_pokemon:
         max_hp = pokemon["stats"]["HP"]
-        if "current_hp" not in pokemon:
-            pokemon["current_hp"] = max_hp
-        current_hp = pokemon["current_hp"]
+        current_hp = pokemon.get("current_hp", max_hp)
         opponent_score += current_hp / max_hp
     
     # Normalize scores
-    player_score /= len(battle_state["player_team"]["pokemon"])
-    opponent_score /= len(battle_state["opponent_team"]["pokemon"])
+    player_score /= len(player_pokemon)
+    opponent_score /= len(opponent_pokemon)
     
     return player_score - opponent_score
 
-def find_best_move(battle_state: Dict, depth: int = 3) -> List[BattleAction]:
-    """Find the best sequence of moves using minimax with alpha-beta pruning."""
-    def minimax(state: Dict, depth: int, alpha: float, beta: float, is_maximizing: bool) -> Tuple[float, Optional[BattleAction]]:
-        if depth == 0:
-            return evaluate_position(state), None
+# Packed battle state for the compiled search kernel
+MAX_TEAM_SIZE = 6
+MAX_MOVES = 4
+STAT_ORDER = ["HP", "Attack", "Defense", "Sp. Attack", "Sp. Defense", "Speed"]
+HP, ATK, DEF, SPA, SPD, SPE = range(len(STAT_ORDER))  # Stat positions in STAT_ORDER
+
+@dataclass
+class TeamArrays:
+    """One team stored as per-field columns indexed by team slot.
+    
+    Missing types are -1 and moves without power have a power of -1.
+    """
+    hp: np.ndarray  # int32 (6,)
+    max_hp: np.ndarray  # int32 (6,)
+    attack: np.ndarray  # int32 (6,)
+    defense: np.ndarray  # int32 (6,)
+    spa: np.ndarray  # int32 (6,)
+    spd: np.ndarray  # int32 (6,)
+    speed: np.ndarray  # int32 (6,)
+    level: np.ndarray  # int32 (6,)
+    types: np.ndarray  # int8 (6, 2)
+    move_power: np.ndarray  # int16 (6, 4)
+    move_type: np.ndarray  # int8 (6, 4)
+    move_physical: np.ndarray  # bool (6, 4)
+    n_moves: np.ndarray  # int8 (6,)
+    size: int
+    active_index: int
+
+def load_team(team: Dict) -> TeamArrays:
+    """Load a team dict into column arrays."""
+    arrays = TeamArrays(
+        hp=np.zeros(MAX_TEAM_SIZE, dtype=np.int32),
+        max_hp=np.zeros(MAX_TEAM_SIZE, dtype=np.int32),
+        attack=np.zeros(MAX_TEAM_SIZE, dtype=np.int32),
+        defense=np.zeros(MAX_TEAM_SIZE, dtype=np.int32),
+        spa=np.zeros(MAX_TEAM_SIZE, dtype=np.int32),
+        spd=np.zeros(MAX_TEAM_SIZE, dtype=np.int32),
+        speed=np.zeros(MAX_TEAM_SIZE, dtype=np.int32),
+        level=np.zeros(MAX_TEAM_SIZE, dtype=np.int32),
+        types=np.full((MAX_TEAM_SIZE, 2), -1, dtype=np.int8),
+        move_power=np.full((MAX_TEAM_SIZE, MAX_MOVES), -1, dtype=np.int16),
+        move_type=np.zeros((MAX_TEAM_SIZE, MAX_MOVES), dtype=np.int8),
+        move_physical=np.zeros((MAX_TEAM_SIZE, MAX_MOVES), dtype=bool),
+        n_moves=np.zeros(MAX_TEAM_SIZE, dtype=np.int8),
+        size=len(team["pokemon"]),
+        active_index=team["active_pokemon_index"]
+    )
+    
+    for slot, pokemon in enumerate(team["pokemon"]):
+        stats = pokemon["stats"]
+        # stats["HP"] tracks current HP during battle; current_hp keeps the starting value
+        arrays.hp[slot] = stats["HP"]
+        arrays.max_hp[slot] = max(stats["HP"], pokemon.get("current_hp") or 0)
+        arrays.attack[slot] = stats.get("Attack", 0)
+        arrays.defense[slot] = stats.get("Defense", 0)
+        arrays.spa[slot] = stats.get("Sp. Attack", 0)
+        arrays.spd[slot] = stats.get("Sp. Defense", 0)
+        arrays.speed[slot] = stats.get("Speed", 0)
+        arrays.level[slot] = pokemon["level"]
+        for i, type_ in enumerate(pokemon["types"][:2]):
+            arrays.types[slot, i] = TYPE_IDX[type_]
+        arrays.n_moves[slot] = min(len(pokemon["moves"]), MAX_MOVES)
+        for i, move in enumerate(pokemon["moves"][:MAX_MOVES]):
+            if move["power"] is not None:
+                arrays.move_power[slot, i] = move["power"]
+            arrays.move_type[slot, i] = TYPE_IDX[move["type"]]
+            arrays.move_physical[slot, i] = move["category"] == "Physical"
+    
+    return arrays
+
+@dataclass
+class StateArrays:
+    """Both teams stacked into arrays indexed by [team, slot, ...] for the search kernel.
+    
+    Team 0 is the player and team 1 the opponent.
+    """
+    hp: np.ndarray  # int32 (2, 6)
+    max_hp: np.ndarray  # int32 (2, 6)
+    stats: np.ndarray  # int32 (2, 6, 6) in STAT_ORDER
+    level: np.ndarray  # int32 (2, 6)
+    types: np.ndarray  # int8 (2, 6, 2)
+    move_power: np.ndarray  # int16 (2, 6, 4)
+    move_type: np.ndarray  # int8 (2, 6, 4)
+    move_physical: np.ndarray  # bool (2, 6, 4)
+    n_moves: np.ndarray  # int8 (2, 6)
+    n_pokemon: np.ndarray  # int8 (2,)
+    active: np.ndarray  # int8 (2,)
+    weather: int
+
+def pack_state(battle_state: Dict) -> StateArrays:
+    """Pack a battle state dict into contiguous arrays."""
+    teams = [load_team(battle_state["player_team"]), load_team(battle_state["opponent_team"])]
+    return StateArrays(
+        hp=np.stack([t.hp for t in teams]),
+        max_hp=np.stack([t.max_hp for t in teams]),
+        stats=np.stack([np.stack([t.max_hp, t.attack, t.defense, t.spa, t.spd, t.speed], axis=-1) for t in teams]),
+        level=np.stack([t.level for t in teams]),
+        types=np.stack([t.types for t in teams]),
+        move_power=np.stack([t.move_power for t in teams]),
+        move_type=np.stack([t.move_type for t in teams]),
+        move_physical=np.stack([t.move_physical for t in teams]),
+        n_moves=np.stack([t.n_moves for t in teams]),
+        n_pokemon=np.array([t.size for t in teams], dtype=np.int8),
+        active=np.array([t.active_index for t in teams], dtype=np.int8),
+        weather=WEATHER_IDS.get(battle_state.get("weather"), 0)
+    )
+
+def build_modifier_tables(state: StateArrays) -> Tuple[np.ndarray, np.ndarray]:
+    """Precompute STAB and type effectiveness for every move against every defender.
+    
+    Returns stab_table[team, slot, move] and type_eff_table[team, slot, move,
+    defender_slot], where the defender is on the other team. Neither changes
+    during a search, which only updates HP.
+    """
+    is_stab = (state.move_type[:, :, :, None] == state.types[:, :, None, :]).any(axis=-1)
+    stab_table = np.where(is_stab, 1.5, 1.0)
+    
+    # Defending types of the other team, broadcast against every attacking move
+    move_types = state.move_type[:, :, :, None, None]
+    def_types = state.types[::-1][:, None, None, :, :]
+    effectiveness = TYPE_MATRIX[move_types, def_types]
+    type_eff_table = np.where(def_types >= 0, effectiveness, 1.0).prod(axis=-1)
+    
+    return stab_table, type_eff_table
+
+@njit(cache=True)
+def _move_damage(stats, level, move_power, move_type, move_physical, stab_table, type_eff_table, weather, team, slot, move_idx, def_team, def_slot):
+    """Average damage of one move, matching calculate_damage."""
+    power = move_power[team, slot, move_idx]
+    if power < 0:
+        return 0
+    
+    move_t = move_type[team, slot, move_idx]
+    if move_physical[team, slot, move_idx]:
+        atk = stats[team, slot, ATK]
+        def_ = stats[def_team, def_slot, DEF]
+    else:
+        atk = stats[team, slot, SPA]
+        def_ = stats[def_team, def_slot, SPD]
+    
+    base_damage = ((2 * level[team, slot] / 5 + 2) * power * atk / def_ / 50 + 2)
+    
+    modifiers = stab_table[team, slot, move_idx] * type_eff_table[team, slot, move_idx, def_slot]
+    
+    modifiers *= WEATHER_MATRIX[weather, move_t]
+    
+    min_damage = int(base_damage * modifiers * 0.85)
+    max_damage = int(base_damage * modifiers)
+    return (min_damage + max_damage) // 2
+
+@njit(cache=True)
+def _evaluate_hp(hp, max_hp, n_pokemon):
+    """Remaining HP fraction of the player's team minus the opponent's."""
+    scores = np.zeros(2)
+    for team in range(2):
+        for slot in range(n_pokemon[team]):
+            if max_hp[team, slot] > 0:
+                scores[team] += hp[team, slot] / max_hp[team, slot]
+        scores[team] /= n_pokemon[team]
+    return scores[0] - scores[1]
+
+# Transposition table bound flags
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+
+def new_transposition_table() -> Tuple[Dict, Dict]:
+    """Empty transposition tables for _minimax.
+    
+    Both are keyed by (player active HP, opponent active HP, is_maximizing);
+    the search never switches, so the active Pokémon's HP fully determines
+    every other position. The first holds (depth, bound flag, score, best move
+    index) and the second the principal variation found below that position.
+    """
+    key_type = nb_types.UniTuple(nb_types.int64, 3)
+    tt = typed.Dict.empty(key_type=key_type, value_type=nb_types.UniTuple(nb_types.float64, 4))
+    tt_pv = typed.Dict.empty(key_type=key_type, value_type=nb_types.int64[:])
+    return tt, tt_pv
+
+@njit(cache=True)
+def _minimax(hp, max_hp, stats, level, move_power, move_type, move_physical, stab_table, type_eff_table, n_moves, n_pokemon, active, weather, depth, alpha, beta, is_maximizing, tt, tt_pv, pv):
+    """Alpha-beta search over HP arrays; returns (score, best move index or -1).
+    
+    The principal variation (best move index per ply, -1 where unknown) is
+    written into pv, which has one slot per remaining ply.
+    """
+    if depth == 0:
+        return _evaluate_hp(hp, max_hp, n_pokemon), -1
+    
+    team = 0 if is_maximizing else 1
+    def_team = 1 - team
+    slot = active[team]
+    def_slot = active[def_team]
+    
+    # Reuse a stored result for this position, or at least its best move for ordering
+    key = (np.int64(hp[0, active[0]]), np.int64(hp[1, active[1]]), np.int64(is_maximizing))
+    alpha_orig = alpha
+    beta_orig = beta
+    first = 0
+    if key in tt:
+        tt_depth, tt_flag, tt_value, tt_index = tt[key]
+        if tt_depth == depth:
+            if tt_flag == TT_EXACT:
+                pv[:] = tt_pv[key]
+                return tt_value, int(tt_index)
+            elif tt_flag == TT_LOWER:
+                alpha = max(alpha, tt_value)
+            else:
+                beta = min(beta, tt_value)
+            if beta <= alpha:
+                pv[:] = tt_pv[key]
+                return tt_value, int(tt_index)
+        if tt_index >= 0:
+            first = int(tt_index)
+    
+    n = n_moves[team, slot]
+    best_eval = -np.inf if is_maximizing else np.inf
+    best_index = -1
+    for k in range(n):
+        # Try the remembered best move first, then the rest in order
+        if k == 0:
+            i = first
+        elif k <= first:
+            i = k - 1
+        else:
+            i = k
+        
+        # Simulate move on a copy of the HP table
+        damage = _move_damage(stats, level, move_power, move_type, move_physical, stab_table, type_eff_table, weather, team, slot, i, def_team, def_slot)
+        new_hp = hp.copy()
+        new_hp[def_team, def_slot] = max(0, new_hp[def_team, def_slot] - damage)
+        child_pv = np.full(depth - 1, -1, dtype=np.int64)
+        eval_, _ = _minimax(new_hp, max_hp, stats, level, move_power, move_type, move_physical, stab_table, type_eff_table, n_moves, n_pokemon, active, weather, depth - 1, alpha, beta, not is_maximizing, tt, tt_pv, child_pv)
         
-        best_action = None
+        # Ties go to the lower move index regardless of search order
         if is_maximizing:
-            max_eval = float('-inf')
-            # Try each possible move
-            active_pokemon = state["player_team"]["pokemon"][state["player_team"]["active_pokemon_index"]]
-            for i, move in enumerate(active_pokemon["moves"]):
-                # Simulate move
-                new_state = simulate_move(state, BattleAction("move", "player", i))
-                eval_, _ = minimax(new_state, depth - 1, alpha, beta, False)
-                
-                if eval_ > max_eval:
-                    max_eval = eval_
-                    best_action = BattleAction("move", "player", i)
-                
-                alpha = max(alpha, eval_)
-                if beta <= alpha:
-                    break
-            
-            return max_eval, best_action
+            improved = eval_ > best_eval or (eval_ == best_eval and i < best_index)
+            alpha = max(alpha, eval_)
         else:
-            min_eval = float('inf')
-            # Try each possible opponent move
-            active_pokemon = state["opponent_team"]["pokemon"][state["opponent_team"]["active_pokemon_index"]]
-            for i, move in enumerate(active_pokemon["moves"]):
-                # Simulate move
-                new_state = simulate_move(state, BattleAction("move", "opponent", i))
-                eval_, _ = minimax(new_state, depth - 1, alpha, beta, True)
-                
-                if eval_ < min_eval:
-                    min_eval = eval_
-                    best_action = BattleAction("move", "opponent", i)
-                
-                beta = min(beta, eval_)
-                if beta <= alpha:
-                    break
-            
-            return min_eval, best_action
+            improved = eval_ < best_eval or (eval_ == best_eval and i < best_index)
+            beta = min(beta, eval_)
+        if improved:
+            best_eval = eval_
+            best_index = i
+            pv[0] = i
+            pv[1:] = child_pv
+        if beta <= alpha:
+            break
+    
+    if best_eval <= alpha_orig:
+        flag = TT_UPPER
+    elif best_eval >= beta_orig:
+        flag = TT_LOWER
+    else:
+        flag = TT_EXACT
+    tt[key] = (float(depth), float(flag), best_eval, float(best_index))
+    tt_pv[key] = pv.copy()
     
-    # Start minimax search
-    best_moves = []
-    current_state = battle_state.copy()
+    return best_eval, best_index
+
+def find_best_move(battle_state: Dict, depth: int = 3, time_budget: Optional[float] = None) -> List[BattleAction]:
+    """Find the best sequence of moves using iterative-deepening minimax with alpha-beta pruning.
+    
+    Each iteration shares the transposition table, so the previous
+    iteration's best moves are searched first. With a time_budget (seconds),
+    deepening stops once the budget is spent and the last completed
+    iteration's line is returned.
+    
+    Returns the principal variation: alternating player and opponent moves,
+    starting with the player's.
+    """
+    state = pack_state(battle_state)
+    stab_table, type_eff_table = build_modifier_tables(state)
+    tt, tt_pv = new_transposition_table()
+    pv = np.full(0, -1, dtype=np.int64)
+    start = time.perf_counter()
+    
+    # Start minimax search, one ply deeper each iteration
+    for iteration_depth in range(1, depth + 1):
+        pv = np.full(iteration_depth, -1, dtype=np.int64)
+        _minimax(state.hp, state.max_hp, state.stats, state.level, state.move_power, state.move_type,
+                 state.move_physical, stab_table, type_eff_table, state.n_moves, state.n_pokemon,
+                 state.active, state.weather, iteration_depth, -np.inf, np.inf, True, tt, tt_pv, pv)
+        if time_budget is not None and time.perf_counter() - start >= time_budget:
+            break
     
-    for _ in range(depth):
-        _, best_action = minimax(current_state, depth, float('-inf'), float('inf'), True)
-        if best_action:
-            best_moves.append(best_action)
-            current_state = simulate_move(current_state, best_action)
+    best_moves = []
+    for ply, move_index in enumerate(pv):
+        if move_index < 0:
+            break
+        best_moves.append(make_action("move", "player" if ply % 2 == 0 else "opponent", int(move_index)))
     
     return best_moves
 
+def _clone_state(battle_state: Dict) -> Dict:
+    """Shallow-clone the battle state; Pokémon dicts stay shared with the original."""
+    return {
+        **battle_state,
+        "player_team": {**battle_state["player_team"], "pokemon": list(battle_state["player_team"]["pokemon"])},
+        "opponent_team": {**battle_state["opponent_team"], "pokemon": list(battle_state["opponent_team"]["pokemon"])}
+    }
+
+def _clone_pokemon(pokemon: Dict) -> Dict:
+    """Copy the fields of a Pokémon that battle actions mutate."""
+    clone = {**pokemon, "stats": {**pokemon["stats"]}}
+    if "stat_stages" in pokemon:
+        clone["stat_stages"] = {**pokemon["stat_stages"]}
+    return clone
+
+def clone_state(battle_state: Dict) -> Dict:
+    """Copy every mutable container in the battle state.
+    
+    A cheaper stand-in for copy.deepcopy: moves, types and other fields that
+    are never mutated mid-turn are shared with the original.
+    """
+    new_state = _clone_state(battle_state)
+    for team_key in ["player_team", "opponent_team"]:
+        new_state[team_key]["pokemon"] = [_clone_pokemon(p) for p in new_state[team_key]["pokemon"]]
+    for key in ["screens", "hazards"]:
+        if key in new_state:
+            new_state[key] = list(new_state[key])
+    return new_state
+
 def simulate_move(battle_state: Dict, action: BattleAction) -> Dict:
     """Simulate a move and return the resulting battle state."""
-    # Deep copy the battle state
-    new_state = copy.deepcopy(battle_state)
+    new_state = _clone_state(battle_state)
     
     if action.action_type == "move":
         attacker_team = "player_team" if action.user == "player" else "opponent_team"
         defender_team = "opponent_team" if action.user == "player" else "player_team"
         
-        attacker = new_state[attacker_team]["pokemon"][new_state[attacker_team]["active_pokemon_index"]]
-        defender = new_state[defender_team]["pokemon"][new_state[defender_team]["active_pokemon_index"]]
+        attacking_team = new_state[attacker_team]
+        defending_team = new_state[defender_team]
+        attacker = attacking_team["pokemon"][attacking_team["active_pokemon_index"]]
+        
+        # Only the defender changes, so only it gets copied
+        defender_pokemon = defending_team["pokemon"]
+        defender_index = defending_team["active_pokemon_index"]
+        defender = _clone_pokemon(defender_pokemon[defender_index])
+        defender_pokemon[defender_index] = defender
         
         move = attacker["moves"][action.index]
         
@@ -206,20 +510,23 @@ def simulate_move(battle_state: Dict, action: BattleAction) -> Dict:
 def determine_best_action(battle_state: Dict, user: str) -> Optional[BattleAction]:
     """Determine the best action for a player."""
     team_key = "player_team" if user == "player" else "opponent_team"
-    active_pokemon = battle_state[team_key]["pokemon"][battle_state[team_key]["active_pokemon_index"]]
+    team_pokemon = battle_state[team_key]["pokemon"]
+    active_index = battle_state[team_key]["active_pokemon_index"]
+    active_pokemon = team_pokemon[active_index]
     
-    print(f"\nDetermining action for {user}'s {active_pokemon['name']}")
-    print(f"Current HP: {active_pokemon['stats'].get('HP', 0)}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Determining action for %s's %s", user, active_pokemon["name"])
+        logger.debug("Current HP: %s", active_pokemon["stats"].get("HP", 0))
     
     # Check if current Pokémon is fainted
     if active_pokemon["stats"].get("HP", 0) <= 0:
-        print(f"{active_pokemon['name']} is fainted, looking for a switch")
+        logger.debug("%s is fainted, looking for a switch", active_pokemon["name"])
         # Find a valid switch-in
-        for i, pokemon in enumerate(battle_state[team_key]["pokemon"]):
-            if pokemon["stats"].get("HP", 0) > 0 and i != battle_state[team_key]["active_pokemon_index"]:
-                print(f"Found valid switch to {pokemon['name']}")
-                return BattleAction(action_type="switch", user=user, index=i)
-        print("No valid switches found!")
+        for i, pokemon in enumerate(team_pokemon):
+            if pokemon["stats"].get("HP", 0) > 0 and i != active_index:
+                logger.debug("Found valid switch to %s", pokemon["name"])
+                return make_action("switch", user, i)
+        logger.debug("No valid switches found!")
         return None
     
     # Evaluate each move
@@ -235,13 +542,13 @@ def determine_best_action(battle_state: Dict, user: str) -> Optional[BattleActio
     # Check if switching would be better
     best_switch_score = evaluate_switches(battle_state, user)
     if best_switch_score > best_move_score + 20:  # Threshold to prefer switching
-        for i, pokemon in enumerate(battle_state[team_key]["pokemon"]):
-            if pokemon["stats"].get("HP", 0) > 0 and i != battle_state[team_key]["active_pokemon_index"]:
-                print(f"Switching to {pokemon['name']} is better")
-                return BattleAction(action_type="switch", user=user, index=i)
+        for i, pokemon in enumerate(team_pokemon):
+            if pokemon["stats"].get("HP", 0) > 0 and i != active_index:
+                logger.debug("Switching to %s is better", pokemon["name"])
+                return make_action("switch", user, i)
     
-    print(f"Using move {active_pokemon['moves'][best_move_index]['name']}")
-    return BattleAction(action_type="move", user=user, index=best_move_index)
+    logger.debug("Using move %s", active_pokemon["moves"][best_move_index]["name"])
+    return make_action("move", user, best_move_index)
 
 def evaluate_move(move: Dict, battle_state: Dict, user: str) -> float:
     """Evaluate how good a move would be in the current situation."""
@@ -249,8 +556,10 @@ def evaluate_move(move: Dict, battle_state: Dict, user: str) -> float:
     team_key = "player_team" if user == "player" else "opponent_team"
     opp_key = "opponent_team" if user == "player" else "player_team"
     
-    attacker = battle_state[team_key]["pokemon"][battle_state[team_key]["active_pokemon_index"]]
-    defender = battle_state[opp_key]["pokemon"][battle_state[opp_key]["active_pokemon_index"]]
+    team = battle_state[team_key]
+    opp_team = battle_state[opp_key]
+    attacker = team["pokemon"][team["active_pokemon_index"]]
+    defender = opp_team["pokemon"][opp_team["active_pokemon_index"]]
     
     # Calculate damage
     min_damage, max_damage = calculate_damage(move, attacker, defender, battle_state.get("weather"))
@@ -281,8 +590,10 @@ def evaluate_switches(battle_state: Dict, user: str) -> float:
     team_key = "player_team" if user == "player" else "opponent_team"
     opp_key = "opponent_team" if user == "player" else "player_team"
     
-    current_pokemon = battle_state[team_key]["pokemon"][battle_state[team_key]["active_pokemon_index"]]
-    opponent = battle_state[opp_key]["pokemon"][battle_state[opp_key]["active_pokemon_index"]]
+    opp_team = battle_state[opp_key]
+    opponent = opp_team["pokemon"][opp_team["active_pokemon_index"]]
+    opp_move_types = [move["type"] for move in opponent["moves"]]
+    opp_types = opponent["types"]
     
     # Base switch score
     best_score = 0.0
@@ -295,14 +606,14 @@ def evaluate_switches(battle_state: Dict, user: str) -> float:
         score = 0.0
         
         # Resist opponent's moves
-        for move in opponent["moves"]:
-            effectiveness = calculate_type_effectiveness(move["type"], pokemon["types"])
+        for move_type in opp_move_types:
+            effectiveness = calculate_type_effectiveness(move_type, pokemon["types"])
             if effectiveness < 1:
                 score += 30 * (1 - effectiveness)
         
         # Good matchup against opponent's types
         for type_ in pokemon["types"]:
-            effectiveness = calculate_type_effectiveness(type_, opponent["types"])
+            effectiveness = calculate_type_effectiveness(type_, opp_types)
             if effectiveness > 1:
                 score += 20 * effectiveness
         
@@ -310,22 +621,33 @@ def evaluate_switches(battle_state: Dict, user: str) -> float:
     
     return best_score
 
+def _priority_tuple(action: Optional[BattleAction], battle_state: Dict) -> Tuple[int, int]:
+    """Ordering key for an action: (priority, speed), higher goes first."""
+    if not action:
+        return (-999, -999)
+    
+    team_key = "player_team" if action.user == "player" else "opponent_team"
+    team = battle_state[team_key]
+    pokemon = team["pokemon"][team["active_pokemon_index"]]
+    
+    if action.action_type == "switch":
+        return (6, pokemon["stats"]["Speed"])  # Switches happen before moves
+    else:
+        move = pokemon["moves"][action.index]
+        return (move.get("priority", 0), pokemon["stats"]["Speed"])
+
 def sort_actions(actions: List[BattleAction], battle_state: Dict) -> List[BattleAction]:
     """Sort actions by priority and speed."""
-    def get_action_priority(action: BattleAction) -> Tuple[int, int]:
-        if not action:
-            return (-999, -999)
-        
-        team_key = "player_team" if action.user == "player" else "opponent_team"
-        pokemon = battle_state[team_key]["pokemon"][battle_state[team_key]["active_pokemon_index"]]
-        
-        if action.action_type == "switch":
-            return (6, pokemon["stats"]["Speed"])  # Switches happen before moves
-        else:
-            move = pokemon["moves"][action.index]
-            return (move.get("priority", 0), pokemon["stats"]["Speed"])
-    
-    return sorted(actions, key=get_action_priority, reverse=True)
+    # A turn has at most one action per side, so a single comparison usually suffices
+    if len(actions) <= 1:
+        return list(actions)
+    if len(actions) == 2:
+        first, second = actions
+        if _priority_tuple(first, battle_state) >= _priority_tuple(second, battle_state):
+            return [first, second]
+        return [second, first]
+    
+    return sorted(actions, key=lambda action: _priority_tuple(action, battle_state), reverse=True)
 
 def apply_action(battle_state: Dict, action: BattleAction) -> Dict:
     """Apply an action and return the results."""
@@ -337,9 +659,8 @@ def apply_action(battle_state: Dict, action: BattleAction) -> Dict:
             "new_state": battle_state
         }
     
-    new_state = battle_state.copy()  # Deep copy needed in real implementation
-    effects = []
-    log = []
+    # Only the containers actions mutate are copied; the caller's state is left untouched
+    new_state = clone_state(battle_state)
     
     if action.action_type == "switch":
         result = apply_switch(new_state, action)
@@ -347,76 +668,94 @@ def apply_action(battle_state: Dict, action: BattleAction) -> Dict:
         result = apply_move(new_state, action)
     
     return {
-        "action_desc": result["desc"],
+        "action_desc": result["action_desc"],
         "effects": result["effects"],
         "log": result["log"],
-        "new_state": result["new_state"]
+        "new_state": new_state
     }
 
 def apply_switch(battle_state: Dict, action: BattleAction) -> Dict:
     """Apply a switch action."""
-    print(f"\nApplying switch for {action.user}")
+    logger.debug("Applying switch for %s", action.user)
     
     team_key = "player_team" if action.user == "player" else "opponent_team"
-    current_pokemon = battle_state[team_key]["pokemon"][battle_state[team_key]["active_pokemon_index"]]
-    new_pokemon = battle_state[team_key]["pokemon"][action.index]
+    team = battle_state[team_key]
+    current_pokemon = team["pokemon"][team["active_pokemon_index"]]
+    new_pokemon = team["pokemon"][action.index]
     
     # Check if the switch is valid
     if new_pokemon["stats"].get("HP", 0) <= 0:
-        print(f"Cannot switch to fainted {new_pokemon['name']}")
+        logger.debug("Cannot switch to fainted %s", new_pokemon["name"])
         return {
             "action_desc": "Invalid switch",
             "effects": [],
-            "log": [f"Cannot switch to fainted {new_pokemon['name']}"]
+            "log": [f"Cannot switch to fainted {new_pokemon['name']}"],
+            "hp_changes": [],
+            "player_faints": 0,
+            "opponent_faints": 0
         }
     
-    if action.index == battle_state[team_key]["active_pokemon_index"]:
-        print(f"Cannot switch to already active {new_pokemon['name']}")
+    if action.index == team["active_pokemon_index"]:
+        logger.debug("Cannot switch to already active %s", new_pokemon["name"])
         return {
             "action_desc": "Invalid switch",
             "effects": [],
-            "log": [f"Cannot switch to already active {new_pokemon['name']}"]
+            "log": [f"Cannot switch to already active {new_pokemon['name']}"],
+            "hp_changes": [],
+            "player_faints": 0,
+            "opponent_faints": 0
         }
     
     # Perform the switch
-    battle_state[team_key]["active_pokemon_index"] = action.index
-    print(f"Switched from {current_pokemon['name']} to {new_pokemon['name']}")
+    team["active_pokemon_index"] = action.index
+    logger.debug("Switched from %s to %s", current_pokemon["name"], new_pokemon["name"])
     
     return {
         "action_desc": f"Switched to {new_pokemon['name']}",
         "effects": ["switch"],
-        "log": [f"{current_pokemon['name']} was withdrawn!", f"Go! {new_pokemon['name']}!"]
+        "log": [f"{current_pokemon['name']} was withdrawn!", f"Go! {new_pokemon['name']}!"],
+        "hp_changes": [],
+        "player_faints": 0,
+        "opponent_faints": 0
     }
 
 def apply_move(battle_state: Dict, action: BattleAction) -> Dict:
     """Apply a move action."""
-    print(f"\nApplying move for {action.user}")
+    logger.debug("Applying move for %s", action.user)
     
     team_key = "player_team" if action.user == "player" else "opponent_team"
     opp_key = "opponent_team" if action.user == "player" else "player_team"
     
-    attacker = battle_state[team_key]["pokemon"][battle_state[team_key]["active_pokemon_index"]]
-    defender = battle_state[opp_key]["pokemon"][battle_state[opp_key]["active_pokemon_index"]]
+    team = battle_state[team_key]
+    opp_team = battle_state[opp_key]
+    attacker = team["pokemon"][team["active_pokemon_index"]]
+    defender = opp_team["pokemon"][opp_team["active_pokemon_index"]]
     
     # If either Pokémon is fainted, return without applying move
     if attacker["stats"].get("HP", 0) <= 0:
-        print(f"{attacker['name']} is fainted and cannot move")
+        logger.debug("%s is fainted and cannot move", attacker["name"])
         return {
             "action_desc": "Invalid move",
             "effects": [],
-            "log": [f"{attacker['name']} cannot move because it is fainted"]
+            "log": [f"{attacker['name']} cannot move because it is fainted"],
+            "hp_changes": [],
+            "player_faints": 0,
+            "opponent_faints": 0
         }
     
     if defender["stats"].get("HP", 0) <= 0:
-        print(f"{defender['name']} is already fainted")
+        logger.debug("%s is already fainted", defender["name"])
         return {
             "action_desc": "Invalid move",
             "effects": [],
-            "log": [f"{defender['name']} is already fainted"]
+            "log": [f"{defender['name']} is already fainted"],
+            "hp_changes": [],
+            "player_faints": 0,
+            "opponent_faints": 0
         }
     
     move = attacker["moves"][action.index]
-    print(f"Using move {move['name']}")
+    logger.debug("Using move %s", move["name"])
     
     # Calculate damage
     min_damage, max_damage = calculate_damage(move, attacker, defender, battle_state.get("weather"))
@@ -444,13 +783,18 @@ def apply_move(battle_state: Dict, action: BattleAction) -> Dict:
     ]
     log = [msg for msg in log if msg]
     
-    if defender["stats"]["HP"] <= 0:
+    fainted = defender["stats"]["HP"] <= 0
+    if fainted:
         log.append(f"{defender['name']} fainted!")
     
     return {
         "action_desc": f"{attacker['name']} used {move['name']}",
         "effects": [effectiveness_text] if effectiveness_text else [],
-        "log": log
+        "log": log,
+        # (team key, slot, new HP) so callers can mirror HP without rescanning the state
+        "hp_changes": [(opp_key, opp_team["active_pokemon_index"], defender["stats"]["HP"])],
+        "player_faints": int(fainted and opp_key == "player_team"),
+        "opponent_faints": int(fainted and opp_key == "opponent_team")
     }
 
 def apply_end_turn_effects(battle_state: Dict) -> Dict:
@@ -464,67 +808,66 @@ def apply_end_turn_effects(battle_state: Dict) -> Dict:
 
 def simulate_turn(battle_state: Dict) -> Dict:
     """Simulate one full turn of battle."""
-    print("\nStarting turn simulation...")
+    logger.debug("Starting turn simulation...")
     
-    # Deep copy the battle state to avoid modifying the original
-    battle_state = copy.deepcopy(battle_state)
-    print("Created deep copy of battle state")
+    # Copy the battle state to avoid modifying the original
+    battle_state = clone_state(battle_state)
+    logger.debug("Created copy of battle state")
     
     # Initialize current_hp for all Pokemon if not set
     for team in ["player_team", "opponent_team"]:
         for pokemon in battle_state[team]["pokemon"]:
             if "current_hp" not in pokemon:
                 pokemon["current_hp"] = pokemon["stats"]["HP"]
-                print(f"Initialized current_hp for {pokemon['name']}: {pokemon['current_hp']}")
+                logger.debug("Initialized current_hp for %s: %s", pokemon["name"], pokemon["current_hp"])
     
     # Get active Pokemon
-    player_active = battle_state["player_team"]["pokemon"][battle_state["player_team"]["active_pokemon_index"]]
-    opponent_active = battle_state["opponent_team"]["pokemon"][battle_state["opponent_team"]["active_pokemon_index"]]
-    print(f"Active Pokemon - Player: {player_active['name']}, Opponent: {opponent_active['name']}")
+    player_team = battle_state["player_team"]
+    opponent_team = battle_state["opponent_team"]
+    player_active = player_team["pokemon"][player_team["active_pokemon_index"]]
+    opponent_active = opponent_team["pokemon"][opponent_team["active_pokemon_index"]]
+    logger.debug("Active Pokemon - Player: %s, Opponent: %s", player_active["name"], opponent_active["name"])
     
     # Determine actions for both sides
-    print("Determining actions...")
+    logger.debug("Determining actions...")
     player_action = determine_best_action(battle_state, "player")
     opponent_action = determine_best_action(battle_state, "opponent")
-    print(f"Player action: {player_action}")
-    print(f"Opponent action: {opponent_action}")
+    logger.debug("Player action: %s", player_action)
+    logger.debug("Opponent action: %s", opponent_action)
     
     # Execute actions in order of priority
-    actions = [
-        (player_action, "player"),
-        (opponent_action, "opponent")
-    ]
-    actions.sort(key=lambda x: get_action_priority(x[0]))
-    print(f"Sorted actions: {actions}")
+    if _priority_tuple(player_action, battle_state) >= _priority_tuple(opponent_action, battle_state):
+        actions = [(player_action, "player"), (opponent_action, "opponent")]
+    else:
+        actions = [(opponent_action, "opponent"), (player_action, "player")]
+    logger.debug("Sorted actions: %s", actions)
     
     turn_log = []
     for action, user in actions:
-        print(f"\nExecuting action for {user}...")
+        logger.debug("Executing action for %s...", user)
         # Skip if the user's active Pokemon has fainted
         active_pokemon = player_active if user == "player" else opponent_active
         if active_pokemon["current_hp"] <= 0:
-            print(f"Skipping action - {active_pokemon['name']} has fainted")
+            logger.debug("Skipping action - %s has fainted", active_pokemon["name"])
             continue
             
         # Apply the action
-        print(f"Applying action: {action}")
+        logger.debug("Applying action: %s", action)
         try:
             result = apply_move(battle_state, action)
-            print(f"Action result: {result}")
+            logger.debug("Action result: %s", result)
             turn_log.extend(result["log"])
             
             # Check if either side has fainted
             if "faint" in result["effects"]:
-                print("Pokemon fainted - ending turn")
+                logger.debug("Pokemon fainted - ending turn")
                 break
         except Exception as e:
-            print(f"Error applying action: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error applying action: %s", e)
             raise
     
     # Apply end of turn effects here (weather, status, etc.)
-    print("Turn simulation complete")
+    logger.debug("Turn simulation complete")
     
     return {
         "log": turn_log,
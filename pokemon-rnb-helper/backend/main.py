@@ -1,9 +1,13 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+import asyncio
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, conlist
-from typing import List, Optional, Dict, Union
-from enum import Enum
-from showdown_parser import parse_showdown_export
+from typing import Annotated, List, Optional, Dict, Union, Literal
+import msgspec
+import numpy as np
+from showdown_parser import parse_showdown_export, client as pokeapi_client
 from battle_logic import (
     find_best_move,
     simulate_move,
@@ -16,12 +20,26 @@ from battle_logic import (
     evaluate_move,
     evaluate_switches,
     calculate_type_effectiveness,
-    apply_switch
+    apply_switch,
+    clone_state
 )
-import copy
-import traceback
+import logging
+import os
 
-app = FastAPI(title="Pokemon Run and Bun Helper")
+# LOG_LEVEL (e.g. DEBUG) controls backend logging; defaults to WARNING, as does an unknown level name
+_log_level_name = (os.environ.get("LOG_LEVEL") or "WARNING").upper()
+_log_level = logging.getLevelName(_log_level_name)  # An int for known names, a "Level X" string otherwise
+logging.basicConfig(level=_log_level if isinstance(_log_level, int) else logging.WARNING)
+logger = logging.getLogger(__name__)
+if not isinstance(_log_level, int):
+    logger.warning("Unknown LOG_LEVEL %r, using WARNING", _log_level_name)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await pokeapi_client.aclose()
+
+app = FastAPI(title="Pokemon Run and Bun Helper", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -32,66 +50,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class Type(str, Enum):
-    NORMAL = "Normal"
-    FIRE = "Fire"
-    WATER = "Water"
-    ELECTRIC = "Electric"
-    GRASS = "Grass"
-    ICE = "Ice"
-    FIGHTING = "Fighting"
-    POISON = "Poison"
-    GROUND = "Ground"
-    FLYING = "Flying"
-    PSYCHIC = "Psychic"
-    BUG = "Bug"
-    ROCK = "Rock"
-    GHOST = "Ghost"
-    DRAGON = "Dragon"
-    DARK = "Dark"
-    STEEL = "Steel"
-    FAIRY = "Fairy"
+Type = Literal[
+    "Normal", "Fire", "Water", "Electric", "Grass", "Ice",
+    "Fighting", "Poison", "Ground", "Flying", "Psychic", "Bug",
+    "Rock", "Ghost", "Dragon", "Dark", "Steel", "Fairy"
+]
 
-class Move(BaseModel):
+# Battle state DTOs are msgspec Structs: the request body is validated by its C decoder
+class Move(msgspec.Struct):
     name: str
     type: Type
-    power: Optional[int]
-    accuracy: Optional[int]
     pp: int
     category: str  # Physical, Special, or Status
+    power: Optional[int] = None
+    accuracy: Optional[int] = None
     priority: int = 0
-    effects: Optional[str]
+    effects: Optional[str] = None
 
-class Pokemon(BaseModel):
+class Pokemon(msgspec.Struct):
     name: str
     types: List[Type]
     ability: str
     moves: List[Move]
     stats: Dict[str, int]  # HP, Attack, Defense, Sp. Attack, Sp. Defense, Speed
     level: int
-    item: Optional[str]
-    status: Optional[str]
+    item: Optional[str] = None
+    status: Optional[str] = None
     current_hp: Optional[int] = None  # Current HP for battle simulation
     stat_stages: Dict[str, int] = {}  # Attack, Defense, etc. stages (-6 to +6)
     position: Optional[int] = None  # Position in team (1-6)
 
-class Team(BaseModel):
-    pokemon: conlist(Pokemon, min_items=1, max_items=6)  # Ensures team size between 1 and 6
+class Team(msgspec.Struct):
+    pokemon: Annotated[List[Pokemon], msgspec.Meta(min_length=1, max_length=6)]  # Ensures team size between 1 and 6
     active_pokemon_index: int = 0
 
-class BattleState(BaseModel):
+class BattleState(msgspec.Struct):
     player_team: Team
     opponent_team: Team
-    weather: Optional[str]
-    terrain: Optional[str]
+    weather: Optional[str] = None
+    terrain: Optional[str] = None
     screens: List[str] = []  # Light Screen, Reflect, etc.
     hazards: List[str] = []  # Stealth Rock, Spikes, etc.
 
+battle_state_decoder = msgspec.json.Decoder(BattleState)
+
+async def decode_battle_state(request: Request) -> BattleState:
+    """Validate the request body as a BattleState, bypassing pydantic."""
+    try:
+        return battle_state_decoder.decode(await request.body())
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+# The body is read from the raw request, so FastAPI can't see BattleState; publish its schema by hand
+(_battle_state_schema,), _battle_state_components = msgspec.json.schema_components(
+    [BattleState], ref_template="#/components/schemas/{name}"
+)
+BATTLE_STATE_BODY = {
+    "requestBody": {"required": True, "content": {"application/json": {"schema": _battle_state_schema}}}
+}
+_default_openapi = app.openapi
+
+def openapi() -> Dict:
+    """Build the default OpenAPI schema once, adding the msgspec component schemas."""
+    if app.openapi_schema is None:
+        schema = _default_openapi()
+        schema.setdefault("components", {}).setdefault("schemas", {}).update(_battle_state_components)
+    return app.openapi_schema
+
+app.openapi = openapi
+
 class ShowdownExport(BaseModel):
     export_text: str
     team_position: Optional[int] = None  # Position in team (1-6)
     is_opponent: bool = False  # Whether this is an opponent's Pokemon
 
+class ShowdownTeamExport(BaseModel):
+    exports: conlist(ShowdownExport, min_items=1, max_items=6)  # One export per team member
+
 class BattleStrategy(BaseModel):
     turns: List[Dict] = []  # List of turns with actions and results
     winner: Optional[str] = None  # "player" or "opponent"
@@ -101,31 +136,53 @@ class BattleStrategy(BaseModel):
 async def root():
     return {"message": "Pokemon Run and Bun Helper API"}
 
+async def _parse_export(export: ShowdownExport) -> Dict:
+    """Parse one export into a Pokemon dict ready for battle."""
+    pokemon_data = await parse_showdown_export(export.export_text)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Parsed Pokemon data:\n%s", pokemon_data)
+    
+    # Set current HP to max HP initially
+    pokemon_data["current_hp"] = pokemon_data["stats"]["HP"]
+    
+    if export.team_position is not None:
+        pokemon_data["position"] = export.team_position
+    return pokemon_data
+
 @app.post("/parse-showdown")
 async def parse_showdown(export: ShowdownExport):
     try:
-        print(f"Received export text:\n{export.export_text}")  # Debug log
-        pokemon_data = parse_showdown_export(export.export_text)
-        print(f"Parsed Pokemon data:\n{pokemon_data}")  # Debug log
-        
-        # Set current HP to max HP initially
-        pokemon_data["current_hp"] = pokemon_data["stats"]["HP"]
-        
-        if export.team_position is not None:
-            pokemon_data["position"] = export.team_position
-        return pokemon_data
+        return await _parse_export(export)
+    except Exception as e:
+        logger.warning("Error parsing export: %s", e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/parse-showdown-team")
+async def parse_showdown_team(team: ShowdownTeamExport):
+    """Parse up to six exports concurrently; their PokeAPI lookups share one HTTP/2 client."""
+    try:
+        return await asyncio.gather(*[_parse_export(export) for export in team.exports])
     except Exception as e:
-        print(f"Error parsing export: {str(e)}")  # Debug log
+        logger.warning("Error parsing team export: %s", e)
         raise HTTPException(status_code=400, detail=str(e))
 
-@app.post("/calculate-battle-strategy")
-async def calculate_battle_strategy(battle_state: BattleState) -> BattleStrategy:
+@app.post("/calculate-battle-strategy", openapi_extra=BATTLE_STATE_BODY)
+async def calculate_battle_strategy(battle_state: BattleState = Depends(decode_battle_state)) -> BattleStrategy:
     """Calculate the optimal battle strategy."""
     try:
-        print("\nStarting battle simulation...")
+        logger.debug("Starting battle simulation...")
         
         # Convert BattleState to dict for easier manipulation
-        current_state = battle_state.dict()
+        current_state = msgspec.to_builtins(battle_state)
+        
+        # Mirror each team's HP in an array once; turns report HP changes as deltas
+        team_hp = {
+            team_key: np.fromiter(
+                (max(p["stats"].get("HP", 0), 0) for p in current_state[team_key]["pokemon"]),
+                dtype=np.int64, count=len(current_state[team_key]["pokemon"])
+            )
+            for team_key in ("player_team", "opponent_team")
+        }
         
         # Initialize battle tracking
         turns = []
@@ -133,14 +190,14 @@ async def calculate_battle_strategy(battle_state: BattleState) -> BattleStrategy
         turn_number = 1
         
         while turn_number <= 50:  # Maximum 50 turns to prevent infinite loops
-            print(f"\nTurn {turn_number}")
+            logger.debug("Turn %d", turn_number)
             
             # Check if either side has no more usable Pokémon
-            player_alive = any(p["stats"].get("HP", 0) > 0 for p in current_state["player_team"]["pokemon"])
-            opponent_alive = any(p["stats"].get("HP", 0) > 0 for p in current_state["opponent_team"]["pokemon"])
+            player_alive = bool(team_hp["player_team"].any())
+            opponent_alive = bool(team_hp["opponent_team"].any())
             
-            print(f"Player team alive: {player_alive}")
-            print(f"Opponent team alive: {opponent_alive}")
+            logger.debug("Player team alive: %s", player_alive)
+            logger.debug("Opponent team alive: %s", opponent_alive)
             
             if not player_alive:
                 return BattleStrategy(
@@ -156,8 +213,12 @@ async def calculate_battle_strategy(battle_state: BattleState) -> BattleStrategy
                 )
             
             # Simulate the turn
-            print("Simulating turn...")
-            turn_result = simulate_turn(current_state, turn_number)
+            logger.debug("Simulating turn...")
+            turn_result = simulate_turn(
+                current_state, turn_number,
+                int(np.count_nonzero(team_hp["player_team"])),
+                int(np.count_nonzero(team_hp["opponent_team"]))
+            )
             
             # Update battle log
             battle_log.extend(turn_result["log"])
@@ -172,11 +233,13 @@ async def calculate_battle_strategy(battle_state: BattleState) -> BattleStrategy
             
             # Update state and continue
             current_state = turn_result["state"]
+            for team_key, slot, hp in turn_result.pop("hp_changes"):
+                team_hp[team_key][slot] = hp
             turns.append(turn_result)
             turn_number += 1
         
         # If we reach here, it's a draw
-        print("Battle reached 50 turns. Ending in a draw.")
+        logger.debug("Battle reached 50 turns. Ending in a draw.")
         return BattleStrategy(
             turns=turns,
             winner=None,
@@ -184,31 +247,31 @@ async def calculate_battle_strategy(battle_state: BattleState) -> BattleStrategy
         )
     
     except Exception as e:
-        print(f"Error in battle simulation: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Error in battle simulation: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
-def simulate_turn(battle_state: Dict, turn_number: int) -> Dict:
-    """Simulate one full turn of battle."""
-    print(f"\nSimulating turn {turn_number}...")
+def simulate_turn(battle_state: Dict, turn_number: int,
+                  player_alive_count: int, opponent_alive_count: int) -> Dict:
+    """Simulate one full turn of battle, given how many Pokemon each side has left."""
+    logger.debug("Simulating turn %d...", turn_number)
     
-    # Create a deep copy of the battle state to avoid modifying the original
-    current_state = copy.deepcopy(battle_state)
+    # Copy the battle state to avoid modifying the original
+    current_state = clone_state(battle_state)
     
     # Get actions for both sides
-    print("Determining player action...")
+    logger.debug("Determining player action...")
     player_action = determine_best_action(current_state, "player")
     if not player_action:
-        print("Player has no valid actions!")
+        logger.debug("Player has no valid actions!")
         return {
             "winner": "opponent",
             "log": ["Player has no valid moves or switches!"]
         }
     
-    print("Determining opponent action...")
+    logger.debug("Determining opponent action...")
     opponent_action = determine_best_action(current_state, "opponent")
     if not opponent_action:
-        print("Opponent has no valid actions!")
+        logger.debug("Opponent has no valid actions!")
         return {
             "winner": "player",
             "log": ["Opponent has no valid moves or switches!"]
@@ -228,6 +291,7 @@ def simulate_turn(battle_state: Dict, turn_number: int) -> Dict:
         actions.append(opponent_action)
     
     turn_log = []
+    hp_changes = []
     
     # Execute actions in order
     for action in actions:
@@ -237,17 +301,18 @@ def simulate_turn(battle_state: Dict, turn_number: int) -> Dict:
             result = apply_switch(current_state, action)
         
         turn_log.extend(result["log"])
+        hp_changes.extend(result["hp_changes"])
         
         # Check if either side has no more usable Pokémon
-        player_alive = any(p["stats"].get("HP", 0) > 0 for p in current_state["player_team"]["pokemon"])
-        opponent_alive = any(p["stats"].get("HP", 0) > 0 for p in current_state["opponent_team"]["pokemon"])
+        player_alive_count -= result["player_faints"]
+        opponent_alive_count -= result["opponent_faints"]
         
-        if not player_alive:
+        if not player_alive_count:
             return {
                 "winner": "opponent",
                 "log": turn_log + ["Player has no more usable Pokémon!"]
             }
-        elif not opponent_alive:
+        elif not opponent_alive_count:
             return {
                 "winner": "player",
                 "log": turn_log + ["Opponent has no more usable Pokémon!"]
@@ -256,16 +321,17 @@ def simulate_turn(battle_state: Dict, turn_number: int) -> Dict:
     return {
         "winner": None,
         "log": turn_log,
-        "state": current_state
+        "state": current_state,
+        "hp_changes": hp_changes
     }
 
-@app.post("/calculate-ai-move")
-async def calculate_ai_move(battle_state: BattleState):
+@app.post("/calculate-ai-move", openapi_extra=BATTLE_STATE_BODY)
+async def calculate_ai_move(battle_state: BattleState = Depends(decode_battle_state)):
     # TODO: Implement AI move calculation logic
     return {"moves": []}
 
-@app.post("/predict-switch")
-async def predict_switch(battle_state: BattleState):
+@app.post("/predict-switch", openapi_extra=BATTLE_STATE_BODY)
+async def predict_switch(battle_state: BattleState = Depends(decode_battle_state)):
     # TODO: Implement switch prediction logic
     return {"switches": []}
 
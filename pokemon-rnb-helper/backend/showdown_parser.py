@@ -1,59 +1,130 @@
 from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+import asyncio
 import re
-import requests
+import httpx
 import json
+import logging
+import numpy as np
+from battle_logic import STAT_ORDER
+
+logger = logging.getLogger(__name__)
 
 POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
 
-def get_pokemon_data(name: str) -> Dict:
+# One pooled HTTP/2 client for all lookups; closed from the app lifespan
+client = httpx.AsyncClient(base_url=POKEAPI_BASE_URL, http2=True, timeout=10)
+
+DATA_DIR = Path(__file__).parent / "data"
+
+def _load_snapshot(filename: str) -> Dict[str, Dict]:
+    """Load a bundled data snapshot, or nothing if it hasn't been generated."""
+    path = DATA_DIR / filename
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# PokeAPI data is static, so memoise the trimmed payloads for the life of the process.
+# The pokedex/movedex snapshots (keyed by PokeAPI slug; not shipped, see __main__ below)
+# seed the caches once generated, so only entries missing from them hit the network.
+_pokemon_cache: Dict[str, Dict] = _load_snapshot("pokedex.json")
+_move_cache: Dict[str, Dict] = _load_snapshot("movedex.json")
+
+def save_snapshot() -> None:
+    """Write every Pokemon and move looked up so far to the bundled snapshots."""
+    DATA_DIR.mkdir(exist_ok=True)
+    for filename, cache in (("pokedex.json", _pokemon_cache), ("movedex.json", _move_cache)):
+        with open(DATA_DIR / filename, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+
+# Lookups still in flight, so concurrent parsers (e.g. /parse-showdown-team) share one request per slug
+_pending_pokemon: Dict[str, asyncio.Task] = {}
+_pending_moves: Dict[str, asyncio.Task] = {}
+
+async def _shared_lookup(cache: Dict[str, Dict], pending: Dict[str, asyncio.Task], key: str, request) -> Dict:
+    """Return the cached entry for key, or await the one in-flight request for it.
+    
+    A finished lookup is dropped from pending either way, so a failure is
+    raised to every waiter but not cached and the next call retries.
+    """
+    if key in cache:
+        return cache[key]
+    task = pending.get(key)
+    if task is None:
+        task = pending[key] = asyncio.ensure_future(request(key))
+        task.add_done_callback(lambda _: pending.pop(key, None))
+    # Shielded so one cancelled caller doesn't cancel the lookup for the others
+    return await asyncio.shield(task)
+
+async def _fetch_pokemon(clean_name: str) -> Dict:
+    """Fetch and trim Pokemon data from PokeAPI; raises on failure so errors aren't cached."""
+    return await _shared_lookup(_pokemon_cache, _pending_pokemon, clean_name, _request_pokemon)
+
+async def _fetch_move(slug: str) -> Dict:
+    """Fetch and trim move data from PokeAPI; raises on failure so errors aren't cached."""
+    return await _shared_lookup(_move_cache, _pending_moves, slug, _request_move)
+
+async def _request_pokemon(clean_name: str) -> Dict:
+    """Request a Pokemon from PokeAPI and cache its trimmed payload."""
+    response = await client.get(f"/pokemon/{clean_name}")
+    response.raise_for_status()
+    data = response.json()
+    result = _pokemon_cache[clean_name] = {
+        "types": tuple(t["type"]["name"].capitalize() for t in data["types"]),
+        "base_stats": {
+            "HP": data["stats"][0]["base_stat"],
+            "Attack": data["stats"][1]["base_stat"],
+            "Defense": data["stats"][2]["base_stat"],
+            "Sp. Attack": data["stats"][3]["base_stat"],
+            "Sp. Defense": data["stats"][4]["base_stat"],
+            "Speed": data["stats"][5]["base_stat"]
+        }
+    }
+    return result
+
+async def _request_move(slug: str) -> Dict:
+    """Request a move from PokeAPI and cache its trimmed payload."""
+    response = await client.get(f"/move/{slug}/")
+    response.raise_for_status()
+    data = response.json()
+    result = _move_cache[slug] = {
+        "type": data["type"]["name"].capitalize(),
+        "power": data["power"],
+        "accuracy": data["accuracy"],
+        "pp": data["pp"],
+        "category": data["damage_class"]["name"].capitalize(),
+        "priority": data["priority"],
+        "effects": data["effect_entries"][0]["short_effect"] if data["effect_entries"] else None
+    }
+    return result
+
+async def get_pokemon_data(name: str) -> Dict:
     """Get Pokemon data from PokeAPI."""
     # Clean up the name for PokeAPI (lowercase, no special chars)
     clean_name = name.lower().split('@')[0].strip()  # Remove items
     
     try:
-        response = requests.get(f"{POKEAPI_BASE_URL}/pokemon/{clean_name}")
-        if response.ok:
-            data = response.json()
-            return {
-                "types": [t["type"]["name"].capitalize() for t in data["types"]],
-                "base_stats": {
-                    "HP": data["stats"][0]["base_stat"],
-                    "Attack": data["stats"][1]["base_stat"],
-                    "Defense": data["stats"][2]["base_stat"],
-                    "Sp. Attack": data["stats"][3]["base_stat"],
-                    "Sp. Defense": data["stats"][4]["base_stat"],
-                    "Speed": data["stats"][5]["base_stat"]
-                }
-            }
-        else:
-            raise ValueError(f"Pokemon '{name}' not found")
+        data = await _fetch_pokemon(clean_name)
+        # Hand out fresh containers so callers can't mutate the cached entry
+        return {
+            "types": list(data["types"]),
+            "base_stats": dict(data["base_stats"])
+        }
     except Exception as e:
-        print(f"Error fetching Pokemon data: {str(e)}")
+        logger.warning("Error fetching Pokemon data: %s", e)
         raise ValueError(f"Pokemon '{name}' not found")
 
-def get_move_data(move_line: str) -> Dict:
+async def get_move_data(move_line: str) -> Dict:
     """Get move data from the move line."""
     # Clean up the move name by removing leading dashes and spaces
     move_name = move_line.strip('- ').strip()
     
     try:
-        # Get move data from PokeAPI
-        url = f"https://pokeapi.co/api/v2/move/{move_name.lower().replace(' ', '-')}/"
-        response = requests.get(url)
-        if response.ok:
-            data = response.json()
-            return {
-                "name": move_name,
-                "type": data["type"]["name"].capitalize(),
-                "power": data["power"],
-                "accuracy": data["accuracy"],
-                "pp": data["pp"],
-                "category": data["damage_class"]["name"].capitalize(),
-                "priority": data["priority"],
-                "effects": data["effect_entries"][0]["short_effect"] if data["effect_entries"] else None
-            }
+        # Get move data from PokeAPI; "Thunder Bolt" and "thunder-bolt" share a cache entry
+        return {"name": move_name, **(await _fetch_move(move_name.lower().replace(' ', '-')))}
     except Exception as e:
-        print(f"Error fetching move data for {move_name}: {str(e)}")
+        logger.warning("Error fetching move data for %s: %s", move_name, e)
     
     # Fallback to basic move data if API call fails
     return {
@@ -67,7 +138,34 @@ def get_move_data(move_line: str) -> Dict:
         "effects": None
     }
 
-def parse_showdown_export(export: str) -> Dict:
+# Every export line after the first is "Key: value", "- Move" or "<Nature> Nature"
+LINE_RE = re.compile(r"^(?:(Ability|Level|IVs|EVs|Shiny|Gigantamax|Tera Type):\s*(.*)|- ?(.+)|(.+?) Nature)$")
+
+def _parse_ability(pokemon_data: Dict, value: str) -> None:
+    pokemon_data["ability"] = value
+
+def _parse_level(pokemon_data: Dict, value: str) -> None:
+    pokemon_data["level"] = int(value)
+
+def _parse_ivs(pokemon_data: Dict, value: str) -> None:
+    """Parse an "IVs: 0 Atk / 30 SpA" value into pokemon_data["ivs"]."""
+    for part in value.split(" / "):
+        try:
+            iv, stat_abbr = part.split(" ", 1)  # Split on first space
+            stat = "HP" if stat_abbr == "HP" else STAT_ABBREVIATIONS.get(stat_abbr)
+            if stat:
+                pokemon_data["ivs"][stat] = int(iv)
+        except ValueError as e:
+            logger.warning("Error parsing IV: %s - %s", part, e)
+            continue
+
+LINE_HANDLERS = {
+    "Ability": _parse_ability,
+    "Level": _parse_level,
+    "IVs": _parse_ivs
+}
+
+async def parse_showdown_export(export: str) -> Dict:
     """Parse a Pokemon Showdown export string into a Pokemon object."""
     lines = export.strip().split('\n')
     
@@ -119,124 +217,112 @@ def parse_showdown_export(export: str) -> Dict:
             pokemon_data["item"] = item.strip()
         else:
             pokemon_data["name"] = full_name
-
-        # Get Pokemon data from PokeAPI
-        api_data = get_pokemon_data(pokemon_data["name"])
-        pokemon_data["types"] = api_data["types"]
-        base_stats = api_data["base_stats"]
     
     nature_multipliers = {}
+    move_lines = []
     
     for line in lines[1:]:  # Skip the first line (name)
-        line = line.strip()
-        
-        if line.startswith("Ability: "):
-            pokemon_data["ability"] = line.replace("Ability: ", "")
+        match = LINE_RE.match(line.strip())
+        if not match:
+            continue
         
-        elif line.startswith("Level: "):
-            pokemon_data["level"] = int(line.replace("Level: ", ""))
-        
-        elif line.endswith("Nature"):
-            nature = line.replace(" Nature", "")
+        key, value, move, nature = match.groups()
+        if key is not None:
+            handler = LINE_HANDLERS.get(key)  # EVs, Shiny, etc. are ignored
+            if handler:
+                handler(pokemon_data, value)
+        elif move is not None:
+            move_lines.append(move)
+        else:
             nature_multipliers = get_nature_multipliers(nature)
-        
-        elif line.startswith("IVs: "):
-            iv_string = line.replace("IVs: ", "")
-            iv_parts = iv_string.split(" / ")
-            
-            # Map Showdown stat names to our stat names
-            stat_map = {
-                "HP": "HP",
-                "Atk": "Attack",
-                "Def": "Defense",
-                "SpA": "Sp. Attack",
-                "SpD": "Sp. Defense",
-                "Spe": "Speed"
-            }
-            
-            for part in iv_parts:
-                try:
-                    value, stat_abbr = part.split(" ", 1)  # Split on first space
-                    iv = int(value)
-                    # Find the matching stat name
-                    for abbr, full_name in stat_map.items():
-                        if stat_abbr == abbr:
-                            pokemon_data["ivs"][full_name] = iv
-                            break
-                except (ValueError, KeyError) as e:
-                    print(f"Error parsing IV: {part} - {e}")
-                    continue
-        
-        # Parse moves
-        elif line and not line.startswith(("Ability:", "Level:", "IVs:", "EVs:", "Shiny:", "Gigantamax:", "Tera Type:")):
-            if not line.endswith("Nature"):
-                move_data = get_move_data(line)
-                pokemon_data["moves"].append(move_data)
+    
+    # Fetch the Pokemon and all of its moves concurrently
+    api_data, *moves = await asyncio.gather(
+        get_pokemon_data(pokemon_data["name"]),
+        *[get_move_data(move_line) for move_line in move_lines]
+    )
+    pokemon_data["moves"] = moves
+    pokemon_data["types"] = api_data["types"]
+    base_stats = api_data["base_stats"]
     
     # Calculate final stats using base stats, IVs, and nature
-    for stat in pokemon_data["stats"]:
-        if stat == "HP":
-            pokemon_data["stats"][stat] = calculate_hp(
-                base_stats[stat],
-                pokemon_data["ivs"][stat],
-                pokemon_data["level"]
-            )
-        else:
-            base = base_stats[stat]
-            iv = pokemon_data["ivs"][stat]
-            stat_value = calculate_stat(base, iv, pokemon_data["level"])
-            
-            # Apply nature multiplier if applicable
-            if stat == "Attack" and "Atk" in nature_multipliers:
-                stat_value = int(stat_value * nature_multipliers["Atk"])
-            elif stat == "Defense" and "Def" in nature_multipliers:
-                stat_value = int(stat_value * nature_multipliers["Def"])
-            elif stat == "Sp. Attack" and "SpA" in nature_multipliers:
-                stat_value = int(stat_value * nature_multipliers["SpA"])
-            elif stat == "Sp. Defense" and "SpD" in nature_multipliers:
-                stat_value = int(stat_value * nature_multipliers["SpD"])
-            elif stat == "Speed" and "Spe" in nature_multipliers:
-                stat_value = int(stat_value * nature_multipliers["Spe"])
-            
-            pokemon_data["stats"][stat] = stat_value
+    pokemon_data["stats"] = calculate_stats(
+        base_stats, pokemon_data["ivs"], pokemon_data["level"], nature_multipliers
+    )
     
     return pokemon_data
 
-def calculate_hp(base: int, iv: int, level: int) -> int:
-    """Calculate HP stat."""
-    return ((2 * base + iv) * level // 100) + level + 10
+def calculate_stats(base_stats: Dict[str, int], ivs: Dict[str, int], level: int,
+                    nature_multipliers: Dict[str, float]) -> Dict[str, int]:
+    """Calculate all six stats in one vectorized pass."""
+    base = np.array([base_stats[stat] for stat in STAT_ORDER], dtype=np.int32)
+    iv = np.array([ivs[stat] for stat in STAT_ORDER], dtype=np.int32)
+    mult = np.array([nature_multipliers.get(stat, 1.0) for stat in STAT_ORDER])
+    
+    scaled = (2 * base + iv) * level // 100
+    stats = scaled + 5
+    stats[0] = scaled[0] + level + 10  # HP has its own formula and no nature effect
+    stats = (stats * mult).astype(np.int32)
+    return dict(zip(STAT_ORDER, stats.tolist()))
+
+# Showdown nature effects, keyed by stat abbreviation
+NATURE_EFFECTS = {
+    "Hardy": {},
+    "Lonely": {"Atk": 1.1, "Def": 0.9},
+    "Brave": {"Atk": 1.1, "Spe": 0.9},
+    "Adamant": {"Atk": 1.1, "SpA": 0.9},
+    "Naughty": {"Atk": 1.1, "SpD": 0.9},
+    "Bold": {"Def": 1.1, "Atk": 0.9},
+    "Docile": {},
+    "Relaxed": {"Def": 1.1, "Spe": 0.9},
+    "Impish": {"Def": 1.1, "SpA": 0.9},
+    "Lax": {"Def": 1.1, "SpD": 0.9},
+    "Timid": {"Spe": 1.1, "Atk": 0.9},
+    "Hasty": {"Spe": 1.1, "Def": 0.9},
+    "Serious": {},
+    "Jolly": {"Spe": 1.1, "SpA": 0.9},
+    "Naive": {"Spe": 1.1, "SpD": 0.9},
+    "Modest": {"SpA": 1.1, "Atk": 0.9},
+    "Mild": {"SpA": 1.1, "Def": 0.9},
+    "Quiet": {"SpA": 1.1, "Spe": 0.9},
+    "Bashful": {},
+    "Rash": {"SpA": 1.1, "SpD": 0.9},
+    "Calm": {"SpD": 1.1, "Atk": 0.9},
+    "Gentle": {"SpD": 1.1, "Def": 0.9},
+    "Sassy": {"SpD": 1.1, "Spe": 0.9},
+    "Careful": {"SpD": 1.1, "SpA": 0.9},
+    "Quirky": {}
+}
 
-def calculate_stat(base: int, iv: int, level: int) -> int:
-    """Calculate non-HP stat."""
-    return ((2 * base + iv) * level // 100) + 5
+# Showdown stat abbreviations to our stat names
+STAT_ABBREVIATIONS = {
+    "Atk": "Attack",
+    "Def": "Defense",
+    "SpA": "Sp. Attack",
+    "SpD": "Sp. Defense",
+    "Spe": "Speed"
+}
+
+# Nature multipliers keyed by our stat names, so stat calculation is a single lookup
+NATURE_TABLE: Dict[str, Dict[str, float]] = {
+    nature: {STAT_ABBREVIATIONS[abbr]: mult for abbr, mult in effects.items()}
+    for nature, effects in NATURE_EFFECTS.items()
+}
 
 def get_nature_multipliers(nature: str) -> Dict[str, float]:
-    """Get stat multipliers for a given nature."""
-    nature_effects = {
-        "Hardy": {},
-        "Lonely": {"Atk": 1.1, "Def": 0.9},
-        "Brave": {"Atk": 1.1, "Spe": 0.9},
-        "Adamant": {"Atk": 1.1, "SpA": 0.9},
-        "Naughty": {"Atk": 1.1, "SpD": 0.9},
-        "Bold": {"Def": 1.1, "Atk": 0.9},
-        "Docile": {},
-        "Relaxed": {"Def": 1.1, "Spe": 0.9},
-        "Impish": {"Def": 1.1, "SpA": 0.9},
-        "Lax": {"Def": 1.1, "SpD": 0.9},
-        "Timid": {"Spe": 1.1, "Atk": 0.9},
-        "Hasty": {"Spe": 1.1, "Def": 0.9},
-        "Serious": {},
-        "Jolly": {"Spe": 1.1, "SpA": 0.9},
-        "Naive": {"Spe": 1.1, "SpD": 0.9},
-        "Modest": {"SpA": 1.1, "Atk": 0.9},
-        "Mild": {"SpA": 1.1, "Def": 0.9},
-        "Quiet": {"SpA": 1.1, "Spe": 0.9},
-        "Bashful": {},
-        "Rash": {"SpA": 1.1, "SpD": 0.9},
-        "Calm": {"SpD": 1.1, "Atk": 0.9},
-        "Gentle": {"SpD": 1.1, "Def": 0.9},
-        "Sassy": {"SpD": 1.1, "Spe": 0.9},
-        "Careful": {"SpD": 1.1, "SpA": 0.9},
-        "Quirky": {}
-    }
-    return nature_effects.get(nature, {}) 
\ No newline at end of file
+    """Get stat multipliers for a given nature, keyed by stat name."""
+    return NATURE_TABLE.get(nature, {})
+
+async def _build_snapshot(paths: List[str]) -> None:
+    """Parse every export in the given files, then save what was looked up."""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            exports = [block for block in f.read().split("\n\n") if block.strip()]
+        await asyncio.gather(*[parse_showdown_export(export) for export in exports])
+    await client.aclose()
+    save_snapshot()
+
+if __name__ == "__main__":
+    # Usage: python showdown_parser.py team.txt [...]; refreshes data/pokedex.json and data/movedex.json
+    import sys
+    asyncio.run(_build_snapshot(sys.argv[1:]))
@@ -0,0 +1,133 @@
+"""Check the compiled find_best_move search against a brute-force minimax.
+
+Run from the backend directory with: python -m unittest discover tests
+"""
+import random
+import unittest
+
+import numpy as np
+
+import battle_logic as bl
+
+SEED = 5
+N_STATES = 150
+MAX_DEPTH = 5
+
+
+def random_pokemon(rng: random.Random, name: str) -> dict:
+    return {
+        "name": name,
+        "types": rng.sample(bl.TYPES, rng.choice([1, 2])),
+        "level": rng.randint(20, 100),
+        "stats": {stat: rng.randint(20, 300) for stat in bl.STAT_ORDER},
+        "moves": [
+            {
+                "name": f"{name} move {i}",
+                "type": rng.choice(bl.TYPES),
+                "power": rng.choice([None, 40, 60, 80, 100, 120]),
+                "category": rng.choice(["Physical", "Special"])
+            }
+            for i in range(rng.randint(1, bl.MAX_MOVES))
+        ]
+    }
+
+
+def random_state(rng: random.Random) -> dict:
+    teams = {}
+    for team_key in ("player_team", "opponent_team"):
+        pokemon = [random_pokemon(rng, f"{team_key} {i}") for i in range(rng.randint(1, bl.MAX_TEAM_SIZE))]
+        teams[team_key] = {"pokemon": pokemon, "active_pokemon_index": rng.randrange(len(pokemon))}
+    return {**teams, "weather": rng.choice([None, "Sun", "Rain"])}
+
+
+def brute_force(state, stab_table, type_eff_table, hp, depth, is_maximizing):
+    """Plain minimax with no pruning or transposition table."""
+    if depth == 0:
+        return bl._evaluate_hp(hp, state.max_hp, state.n_pokemon)
+
+    team = 0 if is_maximizing else 1
+    def_team = 1 - team
+    slot = state.active[team]
+    def_slot = state.active[def_team]
+    values = []
+    for i in range(state.n_moves[team, slot]):
+        damage = bl._move_damage(state.stats, state.level, state.move_power, state.move_type, state.move_physical,
+                                 stab_table, type_eff_table, state.weather, team, slot, i, def_team, def_slot)
+        new_hp = hp.copy()
+        new_hp[def_team, def_slot] = max(0, new_hp[def_team, def_slot] - damage)
+        values.append(brute_force(state, stab_table, type_eff_table, new_hp, depth - 1, not is_maximizing))
+    return max(values) if is_maximizing else min(values)
+
+
+def replay(state, stab_table, type_eff_table, line):
+    """Evaluate the position reached by playing a line of move indices from the start."""
+    hp = state.hp.copy()
+    for ply, move_index in enumerate(line):
+        team = ply % 2
+        def_team = 1 - team
+        def_slot = state.active[def_team]
+        damage = bl._move_damage(state.stats, state.level, state.move_power, state.move_type, state.move_physical,
+                                 stab_table, type_eff_table, state.weather, team, state.active[team], move_index,
+                                 def_team, def_slot)
+        hp[def_team, def_slot] = max(0, hp[def_team, def_slot] - damage)
+    return bl._evaluate_hp(hp, state.max_hp, state.n_pokemon)
+
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(SEED)
+        self.states = [random_state(rng) for _ in range(N_STATES)]
+
+    def test_minimax_matches_brute_force(self):
+        for battle_state in self.states:
+            state = bl.pack_state(battle_state)
+            stab_table, type_eff_table = bl.build_modifier_tables(state)
+            for depth in range(1, MAX_DEPTH + 1):
+                tt, tt_pv = bl.new_transposition_table()
+                pv = np.full(depth, -1, dtype=np.int64)
+                score, best_index = bl._minimax(state.hp, state.max_hp, state.stats, state.level, state.move_power,
+                                                state.move_type, state.move_physical, stab_table, type_eff_table,
+                                                state.n_moves, state.n_pokemon, state.active, state.weather, depth,
+                                                -np.inf, np.inf, True, tt, tt_pv, pv)
+                expected = brute_force(state, stab_table, type_eff_table, state.hp.copy(), depth, True)
+                self.assertEqual(score, expected)
+                self.assertEqual(best_index, pv[0])
+                self.assertTrue((pv >= 0).all())
+                self.assertEqual(replay(state, stab_table, type_eff_table, pv), expected)
+
+    def test_transposition_entries_bound_true_scores(self):
+        for battle_state in self.states:
+            state = bl.pack_state(battle_state)
+            stab_table, type_eff_table = bl.build_modifier_tables(state)
+            tt, tt_pv = bl.new_transposition_table()
+            pv = np.full(MAX_DEPTH, -1, dtype=np.int64)
+            bl._minimax(state.hp, state.max_hp, state.stats, state.level, state.move_power, state.move_type,
+                        state.move_physical, stab_table, type_eff_table, state.n_moves, state.n_pokemon,
+                        state.active, state.weather, MAX_DEPTH, -np.inf, np.inf, True, tt, tt_pv, pv)
+            for (player_hp, opponent_hp, is_maximizing), (depth, flag, score, _) in tt.items():
+                hp = state.hp.copy()
+                hp[0, state.active[0]] = player_hp
+                hp[1, state.active[1]] = opponent_hp
+                expected = brute_force(state, stab_table, type_eff_table, hp, int(depth), bool(is_maximizing))
+                if flag == bl.TT_EXACT:
+                    self.assertEqual(score, expected)
+                elif flag == bl.TT_LOWER:
+                    self.assertLessEqual(score, expected)
+                else:
+                    self.assertGreaterEqual(score, expected)
+
+    def test_find_best_move_returns_principal_variation(self):
+        for battle_state in self.states:
+            state = bl.pack_state(battle_state)
+            stab_table, type_eff_table = bl.build_modifier_tables(state)
+            for depth in range(1, MAX_DEPTH + 1):
+                line = bl.find_best_move(battle_state, depth)
+                self.assertEqual(len(line), depth)
+                self.assertEqual([action.user for action in line],
+                                 ["player" if ply % 2 == 0 else "opponent" for ply in range(depth)])
+                expected = brute_force(state, stab_table, type_eff_table, state.hp.copy(), depth, True)
+                self.assertEqual(replay(state, stab_table, type_eff_table, [action.index for action in line]), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()